@@ -0,0 +1,141 @@
+"""
+Bulk prompts through Gemini Batch Mode or concurrent async requests.
+
+Regression prompts, warm-up sets and prompt sweeps don't need interactive
+latency, so they can be submitted as one batch job that the provider schedules
+server-side at a discount. When the replies are needed right away, the prompts
+are instead sent concurrently from the async client, so the run takes about as
+long as its slowest requests rather than the sum of all of them.
+"""
+
+import asyncio
+import csv
+import io
+import time
+
+import streamlit as st
+
+from event_loop import run
+from rate_limiter import RateLimiter
+from retry import call
+
+BULK_MODEL = "models/gemini-2.5-flash"  # Batch Mode only serves current model generations
+BULK_RATE_LIMIT_RPM = 10  # Free-tier requests per minute for BULK_MODEL, which has its own quota
+BATCH_JOB = "Batch job (discounted, slower)"
+CONCURRENT = "Concurrent requests (now)"
+DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+
+def submit_batch(client, prompts, system_prompt=None, model=BULK_MODEL):
+    """Submits one single-turn request per prompt and returns the batch job."""
+    config = {"system_instruction": system_prompt} if system_prompt else None
+    requests = [
+        {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "config": config}
+        for prompt in prompts
+    ]
+    return client.batches.create(model=model, src=requests, config={"display_name": "chatbot-bulk-prompts"})
+
+
+def batch_results(job):
+    """Returns the reply to each prompt of a finished job, in submission order."""
+    if job.state.name != "JOB_STATE_SUCCEEDED":
+        raise RuntimeError(f"Batch job {job.name} ended in {job.state.name}")
+    return [
+        item.response.text if item.response else f"Error: {item.error}"
+        for item in job.dest.inlined_responses
+    ]
+
+
+def batch_generate(client, prompts, system_prompt=None, model=BULK_MODEL, poll_interval=5, max_interval=300):
+    """Runs prompts as one batch job and blocks until their replies are ready."""
+    job = submit_batch(client, prompts, system_prompt, model)
+    # Jobs take minutes to hours, so polling backs off exponentially
+    while job.state.name not in DONE_STATES:
+        time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, max_interval)
+        job = client.batches.get(name=job.name)
+    return batch_results(job)
+
+
+# Quotas are counted per model, so bulk requests are paced on a limiter of their own rather
+# than the chat model's, which would let them exceed this model's quota and starve the chat
+@st.cache_resource
+def get_bulk_rate_limiter(model=BULK_MODEL):
+    return RateLimiter(rpm=BULK_RATE_LIMIT_RPM)
+
+
+async def generate_concurrently(client, prompts, limiter, system_prompt=None, model=BULK_MODEL):
+    """Sends each prompt as its own request, as many at once as the limiter admits."""
+    config = {"system_instruction": system_prompt} if system_prompt else None
+
+    async def ask(prompt):
+        response = await call(limiter, client.aio.models.generate_content, model=model, contents=prompt, config=config)
+        return response.text
+
+    # One failed prompt shouldn't discard the replies to all the others
+    replies = await asyncio.gather(*(ask(prompt) for prompt in prompts), return_exceptions=True)
+    return [f"Error: {reply}" if isinstance(reply, Exception) else reply for reply in replies]
+
+
+def read_prompts(file):
+    """Reads the "prompt" column of an uploaded CSV file."""
+    # utf-8-sig drops the byte-order mark spreadsheet exports start with
+    reader = csv.DictReader(io.StringIO(file.getvalue().decode("utf-8-sig")))
+    # Rows shorter than the header have None for their missing columns
+    return [prompt for row in reader if (prompt := (row.get("prompt") or "").strip())]
+
+
+def bulk_prompts_sidebar(client, system_prompt, key):
+    """Sidebar for running a CSV of prompts in bulk and downloading the replies."""
+    job_key = f"batch_job:{key}"
+    replies_key = f"bulk_replies:{key}"
+
+    uploaded = st.sidebar.file_uploader("Bulk prompts CSV", type="csv", key=f"bulk_prompts:{key}")
+    mode = st.sidebar.radio("Send as", [BATCH_JOB, CONCURRENT], key=f"bulk_mode:{key}")
+    if uploaded is not None and st.sidebar.button("Submit prompts", key=f"submit_bulk:{key}"):
+        prompts = read_prompts(uploaded)
+        if not prompts:
+            st.sidebar.error('The CSV needs a "prompt" column with at least one prompt.')
+        elif mode == CONCURRENT:
+            # Driven on the shared event loop, where the limiter caps requests in flight
+            with st.sidebar, st.spinner(f"Sending {len(prompts)} prompts..."):
+                replies = run(generate_concurrently(client, prompts, get_bulk_rate_limiter(), system_prompt))
+            st.session_state[replies_key] = (prompts, replies)
+        else:
+            job = submit_batch(client, prompts, system_prompt)
+            st.session_state[job_key] = (job.name, prompts, job.state.name)
+
+    if job_key in st.session_state:
+        # The job is only checked on request, so chat reruns don't wait on the API
+        name, prompts, state = st.session_state[job_key]
+        status = st.sidebar.empty()
+        if st.sidebar.button("Refresh status", key=f"refresh_batch:{key}"):
+            try:
+                job = client.batches.get(name=name)
+                state = job.state.name
+                if state in DONE_STATES:
+                    # A finished job is not polled again; its replies are kept like a concurrent run's
+                    del st.session_state[job_key]
+                    st.session_state[replies_key] = (prompts, batch_results(job))
+                else:
+                    st.session_state[job_key] = (name, prompts, state)
+            except RuntimeError as e:
+                st.sidebar.error(str(e))
+            except Exception as e:
+                # An expired or deleted job would fail every refresh, so it is forgotten
+                st.session_state.pop(job_key, None)
+                st.sidebar.error(f"Batch job {name} could not be checked: {e}")
+        if job_key in st.session_state:
+            status.info(f"Batch of {len(prompts)} prompts: {state}")
+
+    if replies_key in st.session_state:
+        download_replies(*st.session_state[replies_key], key=f"download_bulk:{key}")
+
+
+def download_replies(prompts, replies, key):
+    """Offers the prompts and their replies as a CSV download."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["prompt", "reply"])
+    writer.writerows(zip(prompts, replies))
+    st.sidebar.download_button("Download replies", output.getvalue(), "replies.csv", "text/csv", key=key)
@@ -0,0 +1,205 @@
+"""
+Response cache shared by the chatbots.
+
+A reply is looked up first by an exact hash of the normalised prompt and then,
+when an embedding function is available, by cosine similarity against the
+prompts answered before. Follow-up questions ("explain that again") depend on
+the conversation so far, so they are keyed on a hash of it as well and only
+match exactly; only a conversation's first question is shared by similarity
+across users. Entries are persisted to SQLite so they survive
+restarts, expire after a TTL and are evicted least-recently-used once the cache
+is full.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+
+# Bumped when the key format changes, so entries stored under the old format aren't matched
+KEY_VERSION = 2
+
+LOCAL_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+GEMINI_EMBED_MODEL = "models/text-embedding-004"
+
+
+@lru_cache(maxsize=None)
+def load_local_embedder(model_name=LOCAL_EMBED_MODEL):
+    """Returns a local sentence embedding function, or None if sentence-transformers is not installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("INFO: sentence-transformers not installed; the response cache only serves exact repeats.")
+        return None
+    return SentenceTransformer(model_name).encode
+
+
+@lru_cache(maxsize=None)
+def load_gemini_embedder(client, model_name=GEMINI_EMBED_MODEL):
+    """Returns an embedding function backed by the Gemini embedding API of a google-genai client."""
+
+    def embed(text):
+        response = client.models.embed_content(
+            model=model_name, contents=text, config={"task_type": "SEMANTIC_SIMILARITY"}
+        )
+        return response.embeddings[0].values
+
+    return embed
+
+
+def conversation_context(messages):
+    """Returns the cache context of a conversation's latest message: a hash of the messages before it.
+
+    It is empty for the first question of a conversation, whose reply doesn't depend on earlier turns.
+    """
+    earlier = messages[:-1]
+    if not any(msg["role"] == "user" for msg in earlier):
+        return ""
+    digest = hashlib.sha256()
+    for msg in earlier:
+        digest.update(f"{msg['role']}\0{msg['content']}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """Exact and semantic cache of chatbot replies for one system prompt."""
+
+    def __init__(self, path, namespace, embed=None, threshold=0.92, ttl=3600, max_entries=1000, min_words=4):
+        self.namespace = hashlib.sha256(f"{KEY_VERSION}\n{namespace}".encode("utf-8")).hexdigest()[:16]
+        self.embed = lru_cache(maxsize=128)(embed) if embed else None
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Shorter first questions ("yes", "tell me more") only make sense within their own conversation
+        self.min_words = min_words
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (reply, created), least recently used first
+        self._keys = []  # key of each used row in self._embeddings
+        self._rows = {}  # key -> its row in self._embeddings
+        # Unit-length prompt embeddings, one row per cached reply. Rows past len(self._keys) are
+        # spare capacity, doubled when full so inserts don't copy the whole matrix each time.
+        self._embeddings = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "namespace TEXT, key TEXT, reply TEXT, embedding BLOB, created REAL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._load()
+
+    def get(self, prompt, context=""):
+        """Returns the cached reply for a prompt in a conversation_context(), or None on a miss."""
+        if not self._cacheable(prompt, context):
+            return None
+        key = self._key(prompt, context)
+        with self._lock:
+            reply = self._lookup(key)
+        # Only a miss pays for an embedding; replies to follow-ups only match the same prompt
+        # after the same conversation
+        if reply is not None or context or not self._keys:
+            return reply
+        vector = self._vector(prompt)
+        if vector is None:
+            return None
+        with self._lock:
+            if not self._keys:
+                return None
+            similarities = self._embeddings[: len(self._keys)] @ vector
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            return self._lookup(self._keys[best])
+
+    def put(self, prompt, reply, context=""):
+        """Stores a reply to a prompt in a conversation_context(), evicting the least recently used entry when full."""
+        if not reply or not self._cacheable(prompt, context):
+            return
+        key = self._key(prompt, context)
+        vector = None if context else self._vector(prompt)
+        created = time.time()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._add(key, reply, created, vector)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, reply, vector.tobytes() if vector is not None else None, created),
+            )
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._conn.commit()
+
+    def _lookup(self, key):
+        """Returns the unexpired reply stored under key and marks it recently used; the lock must be held."""
+        if key not in self._entries:
+            return None
+        reply, created = self._entries[key]
+        if time.time() - created > self.ttl:
+            self._remove(key)
+            self._conn.commit()
+            return None
+        self._entries.move_to_end(key)
+        return reply
+
+    def _cacheable(self, prompt, context):
+        return bool(context) or len(prompt.split()) >= self.min_words
+
+    def _key(self, prompt, context):
+        normalised = " ".join(prompt.lower().split())
+        return hashlib.sha256(f"{context}\n{normalised}".encode("utf-8")).hexdigest()
+
+    def _vector(self, prompt):
+        if self.embed is None:
+            return None
+        try:
+            vector = np.asarray(self.embed(prompt), dtype=np.float32)
+        except Exception as e:
+            # A remote embedder can fail; fall back to exact matches for this prompt
+            print(f"Embedding failed, using exact cache lookup only: {e}")
+            return None
+        return vector / np.linalg.norm(vector)
+
+    def _load(self):
+        """Reloads unexpired entries of this namespace from disk."""
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT key, reply, embedding, created FROM responses WHERE namespace = ? ORDER BY created",
+            (self.namespace,),
+        ).fetchall()
+        for key, reply, embedding, created in rows[-self.max_entries:]:
+            vector = np.frombuffer(embedding, dtype=np.float32) if embedding else None
+            self._add(key, reply, created, vector)
+
+    def _add(self, key, reply, created, vector):
+        self._entries[key] = (reply, created)
+        if vector is not None:
+            size = len(self._keys)
+            if self._embeddings is None:
+                self._embeddings = np.empty((16, vector.shape[0]), dtype=np.float32)
+            elif size == len(self._embeddings):
+                grown = np.empty((2 * size, self._embeddings.shape[1]), dtype=np.float32)
+                grown[:size] = self._embeddings
+                self._embeddings = grown
+            self._embeddings[size] = vector
+            self._rows[key] = size
+            self._keys.append(key)
+
+    def _remove(self, key):
+        del self._entries[key]
+        row = self._rows.pop(key, None)
+        if row is not None:
+            # The last row fills the gap, so removal doesn't shift the rows after it
+            last_key = self._keys.pop()
+            if last_key != key:
+                self._embeddings[row] = self._embeddings[len(self._keys)]
+                self._keys[row] = last_key
+                self._rows[last_key] = row
+        self._conn.execute("DELETE FROM responses WHERE namespace = ? AND key = ?", (self.namespace, key))
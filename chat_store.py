@@ -0,0 +1,88 @@
+"""
+On-disk chat history.
+
+st.session_state is lost when the page is refreshed or the server restarts, so
+every message is also written to SQLite under a session id. A returning session
+reloads its conversation from there instead of starting over.
+
+When Streamlit authentication is configured, the id is derived from the signed-in
+user, so nothing identifying the history ends up in a shareable link. Without it
+the id is carried in the page URL (?session=...): anyone given that link can read
+and continue the conversation, so it should be treated like a password.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+
+def get_session_id():
+    """Returns this browser session's id, keeping it where a refresh finds the same history."""
+    user_id = signed_in_user_id()
+    if user_id:
+        st.session_state.session_id = user_id
+        return user_id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+    # Page switches can drop query parameters, so the id is written back on every run
+    st.query_params["session"] = st.session_state.session_id
+    return st.session_state.session_id
+
+
+def signed_in_user_id():
+    """Returns an id for the signed-in user, or None when authentication isn't configured or used."""
+    # st.user only exists on recent Streamlit versions
+    user = getattr(st, "user", None)
+    if user is None or not user.get("is_logged_in"):
+        return None
+    subject = user.get("sub") or user.get("email")
+    if not subject:
+        return None
+    return hashlib.sha256(f"user:{subject}".encode()).hexdigest()[:32]
+
+
+class ChatStore:
+    """Chat messages of each session and bot, persisted to SQLite."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets other sessions keep reading while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages (session_id TEXT, bot TEXT, ts REAL, role TEXT, content TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, bot, ts)")
+        self._conn.commit()
+
+    def load(self, session_id, bot):
+        """Returns the stored messages of a conversation, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND bot = ? ORDER BY ts, rowid",
+                (session_id, bot),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id, bot, role, content):
+        """Stores one new message of a conversation."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?)", (session_id, bot, time.time(), role, content)
+            )
+            self._conn.commit()
+
+    def replace(self, session_id, bot, messages):
+        """Overwrites a conversation, e.g. after older turns were folded into a summary."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ? AND bot = ?", (session_id, bot))
+            self._conn.executemany(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                [(session_id, bot, now, msg["role"], msg["content"]) for msg in messages],
+            )
+            self._conn.commit()
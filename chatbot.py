@@ -0,0 +1,447 @@
+"""
+Streamlit chat loop shared by the chatbots.
+
+Each bot script only picks a title, a system prompt, a provider and its tools and
+calls run_chatbot(). The clients, response cache and rate limiter are process-wide
+cache_resource objects, so the bots served by hub.py share them instead of each
+keeping its own copy.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import timedelta
+
+import streamlit as st
+from google import genai
+from google.genai import types
+
+from batch import bulk_prompts_sidebar
+from chat_store import ChatStore, get_session_id
+from cache import (
+    GEMINI_EMBED_MODEL,
+    LOCAL_EMBED_MODEL,
+    LLMCache,
+    conversation_context,
+    load_gemini_embedder,
+    load_local_embedder,
+)
+from event_loop import run, iterate
+from history import compact, estimate_tokens, window
+from metrics import record_latency, show_latency
+from rate_limiter import RateLimiter
+from retry import call, open_stream
+from tools import TOOL_CALL_RE, TOOL_SCHEMAS, calculate, call_tool, gemini_tools, get_time, invoke_tool
+
+try:
+    from streamlit.errors import StreamlitSecretNotFoundError
+except ImportError:  # Older Streamlit versions raise FileNotFoundError for a missing secrets file
+    StreamlitSecretNotFoundError = FileNotFoundError
+
+RENDERED_MESSAGES = 50  # Older messages are only drawn on request
+
+GROQ_MODEL = "llama3-8b-8192"
+GROQ_CONTEXT_WINDOW = 8192
+GROQ_RATE_LIMIT_RPM = 28  # Groq's free tier allows 30 requests per minute
+
+GEMINI_MODEL = "models/gemini-1.5-pro-002"  # Context caching needs an explicit model version
+GEMINI_CONTEXT_WINDOW = 2_097_152
+GEMINI_CACHE_TTL = timedelta(minutes=30)
+GEMINI_MIN_CACHE_TOKENS = 32_768  # Smallest context cache Gemini 1.5 models accept
+GEMINI_RATE_LIMIT_RPM = 60  # Requests per minute allowed by the API key's quota tier
+GEMINI_TOOL_ROUNDS = 3  # Chained function calls answered within one turn
+
+PROVIDERS = {
+    "groq": {
+        "page_title": "Groq Chatbot",
+        "api_key": "GROQ_API_KEY",
+        "label": "Groq",
+        "greeting": "Hi! How can I assist you today?",
+        "context_window": GROQ_CONTEXT_WINDOW,
+    },
+    "gemini": {
+        "page_title": "Gemini AI Chatbot",
+        "api_key": "GOOGLE_API_KEY",
+        "label": "Google",
+        "greeting": "Hello! How can I assist you today?",
+        "context_window": GEMINI_CONTEXT_WINDOW,
+    },
+}
+
+
+# Initialize clients once per process instead of on every Streamlit rerun
+@st.cache_resource
+def get_groq_client(api_key):
+    from groq import AsyncGroq
+
+    return AsyncGroq(api_key=api_key)
+
+
+@st.cache_resource
+def get_gemini_client(api_key):
+    return genai.Client(api_key=api_key)
+
+
+# A system prompt large enough for context caching is cached on the provider with the tool
+# declarations, so each turn only pays for the conversation; the resource expires before the
+# provider cache does so a fresh one is created in time.
+@st.cache_resource(ttl=GEMINI_CACHE_TTL - timedelta(minutes=5))
+def get_gemini_config(api_key, system_prompt, model_name=GEMINI_MODEL, tool_names=()):
+    tools = [gemini_tools(tool_names)] if tool_names else None
+    inline_config = types.GenerateContentConfig(system_instruction=system_prompt, tools=tools)
+    # The bundled prompts are far below the minimum, so they skip a request that would be rejected
+    try:
+        prompt_tokens = count_gemini_tokens(get_gemini_client(api_key), model_name, system_prompt)
+    except Exception:
+        prompt_tokens = estimate_tokens(system_prompt)
+    if prompt_tokens < GEMINI_MIN_CACHE_TOKENS:
+        return inline_config
+    try:
+        cache = get_gemini_client(api_key).caches.create(
+            model=model_name,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_prompt,
+                tools=tools,
+                ttl=f"{int(GEMINI_CACHE_TTL.total_seconds())}s",
+            ),
+        )
+        return types.GenerateContentConfig(cached_content=cache.name)
+    except Exception as e:
+        # Prompts below the provider's minimum cacheable size are rejected
+        print(f"Context caching unavailable, sending the system prompt inline: {e}")
+        return inline_config
+
+
+# The system prompt is counted once, not on every turn that checks the token budget;
+# the client is left out of the cache key
+@st.cache_data
+def count_gemini_tokens(_client, model_name, text):
+    return _client.models.count_tokens(model=model_name, contents=text).total_tokens
+
+
+# Repeated or paraphrased questions are answered from a local cache, one per system prompt
+@st.cache_resource
+def get_response_cache(system_prompt):
+    # Prefer the local embedding model; without it, embed through Gemini when a Google key is set
+    embed_model, embed = LOCAL_EMBED_MODEL, load_local_embedder()
+    if embed is None:
+        google_api_key = get_secret("GOOGLE_API_KEY")
+        if google_api_key:
+            embed_model, embed = GEMINI_EMBED_MODEL, load_gemini_embedder(get_gemini_client(google_api_key))
+    # Vectors from different embedding models can't be compared, so each gets its own namespace
+    return LLMCache("llm_cache.db", namespace=f"{embed_model}\n{system_prompt}", embed=embed)
+
+
+# Conversations survive refreshes and restarts; one SQLite store serves every bot
+@st.cache_resource
+def get_chat_store():
+    return ChatStore("chat.db")
+
+
+# Requests are paced under the quota up front instead of failing with 429 and retrying;
+# one limiter per provider, since every bot on it draws from the same quota
+@st.cache_resource
+def get_rate_limiter(provider):
+    rpm = GROQ_RATE_LIMIT_RPM if provider == "groq" else GEMINI_RATE_LIMIT_RPM
+    return RateLimiter(rpm=rpm)
+
+
+def get_secret(name):
+    """Reads a setting from the environment or Streamlit secrets; None if it's unset in both."""
+    value = os.getenv(name)
+    if value:
+        return value
+    try:
+        return st.secrets.get(name)
+    except (StreamlitSecretNotFoundError, FileNotFoundError):
+        # No secrets.toml at all, e.g. when every key is set in the environment
+        return None
+
+
+def get_api_key(provider):
+    """Reads the provider's API key from the environment or Streamlit secrets, stopping the page if unset."""
+    settings = PROVIDERS[provider]
+    api_key = get_secret(settings["api_key"])
+    if not api_key:
+        st.error(f"Please set the {settings['label']} API key in environment variables or Streamlit secrets!")
+        st.stop()
+    return api_key
+
+
+class GroqChat:
+    """Streams Groq chat completions, with tools passed as native function schemas."""
+
+    def __init__(self, api_key, system_prompt, limiter, tool_names):
+        self.client = get_groq_client(api_key)
+        self.system_prompt = system_prompt
+        self.limiter = limiter
+        self.tools = [TOOL_SCHEMAS[name] for name in tool_names]
+
+    def to_payload(self, msg):
+        """Groq takes chat messages as they are stored."""
+        return msg
+
+    def system_tokens(self):
+        """Groq has no token-counting endpoint, so the system prompt's size is estimated."""
+        return estimate_tokens(self.system_prompt)
+
+    def summarize(self, text):
+        """Condenses older conversation turns once the history nears the token budget."""
+        response = run(call(
+            self.limiter,
+            self.client.chat.completions.create,
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": text}],
+        ))
+        return response.choices[0].message.content
+
+    def reply(self, payload, placeholder):
+        """Streams a reply into the placeholder; returns it and whether it may be cached."""
+        # The spinner only covers the wait for the first chunk, including any retries; the
+        # request itself runs on the shared event loop so the async client's connections are reused
+        with st.spinner("Thinking..."):
+            response = run(open_stream(
+                self.limiter,
+                self.client.chat.completions.create,
+                model=GROQ_MODEL,
+                # Keep the static system prompt first and byte-identical across turns so
+                # Groq's prefix caching can reuse it instead of reprocessing it every turn
+                messages=[{"role": "system", "content": self.system_prompt}, *payload],
+                **({"tools": self.tools} if self.tools else {}),
+                stream=True,
+            ))
+
+        # Render tokens as they arrive instead of waiting for the full reply
+        assistant_reply = ""
+        tool_calls = {}
+        for chunk in iterate(response):
+            delta = chunk.choices[0].delta
+            if delta.content:
+                assistant_reply += delta.content
+                placeholder.markdown(assistant_reply)
+            # A call can be streamed over several chunks; fragments sharing an index belong to
+            # the same call and its arguments arrive as consecutive pieces of one JSON string
+            for fragment in delta.tool_calls or ():
+                tool_call = tool_calls.setdefault(fragment.index, {"name": "", "arguments": ""})
+                if fragment.function and fragment.function.name:
+                    tool_call["name"] += fragment.function.name
+                if fragment.function and fragment.function.arguments:
+                    tool_call["arguments"] += fragment.function.arguments
+
+        # Handle tool calling if detected; all requested tools run concurrently
+        for tool_result in run(run_tools([tool_calls[index] for index in sorted(tool_calls)])):
+            assistant_reply += f"\n\n**Tool Result:** {tool_result}"
+
+        # Tool results change between calls, so only plain replies are cached
+        return assistant_reply, not tool_calls
+
+
+class GeminiChat:
+    """Streams Gemini replies, running the tools the model calls through native function calling."""
+
+    def __init__(self, api_key, system_prompt, limiter, tool_names):
+        self.client = get_gemini_client(api_key)
+        self.config = get_gemini_config(api_key, system_prompt, tool_names=tuple(tool_names))
+        self.system_prompt = system_prompt
+        self.limiter = limiter
+        self.tool_names = tool_names
+
+    def to_payload(self, msg):
+        """Formats a chat message as Gemini content (the system prompt is sent through the config)."""
+        return {"role": "model" if msg["role"] == "assistant" else "user", "parts": [{"text": msg["content"]}]}
+
+    def system_tokens(self):
+        """Returns the system prompt's exact token count, or an estimate if it can't be counted."""
+        try:
+            return count_gemini_tokens(self.client, GEMINI_MODEL, self.system_prompt)
+        except Exception as e:
+            print(f"Token counting unavailable, estimating the system prompt's size: {e}")
+            return estimate_tokens(self.system_prompt)
+
+    def summarize(self, text):
+        """Condenses older conversation turns once the history nears the token budget."""
+        # No config, so the bot's own instructions don't shape the summary
+        response = run(call(self.limiter, self.client.aio.models.generate_content, model=GEMINI_MODEL, contents=text))
+        return response.text
+
+    def reply(self, payload, placeholder):
+        """Streams a reply into the placeholder; returns it and whether it may be cached."""
+        # Copied, since function-call turns are only part of this request
+        contents = list(payload)
+
+        assistant_reply, function_calls = self._stream(contents, placeholder)
+        if function_calls:
+            # Feed the tool results back so the model answers with them within the same turn; it
+            # may chain further calls on what it learned, up to GEMINI_TOOL_ROUNDS of them
+            tool_results = []
+            for _ in range(GEMINI_TOOL_ROUNDS):
+                if not function_calls:
+                    break
+                results = [invoke_tool(part.function_call.name, part.function_call.args or {}) for part in function_calls]
+                tool_results.extend(results)
+                contents.append({"role": "model", "parts": function_calls})
+                contents.append({"role": "user", "parts": [
+                    types.Part.from_function_response(name=part.function_call.name, response={"result": result})
+                    for part, result in zip(function_calls, results)
+                ]})
+                assistant_reply, function_calls = self._stream(contents, placeholder)
+            # A turn that ends without text, e.g. still calling tools at the cap, shows their results
+            if not assistant_reply:
+                assistant_reply = "\n\n".join(f"**Tool Result:** {result}" for result in tool_results)
+                placeholder.markdown(assistant_reply)
+            # Tool results change between calls, so only plain replies are cached
+            return assistant_reply, False
+
+        # Models can still ask for a tool in the "[CALL:<tool>] <json>" text form
+        tool_call = TOOL_CALL_RE.match(assistant_reply)
+        if tool_call and tool_call["name"] in self.tool_names:
+            return call_tool(tool_call["name"], tool_call["body"]), False
+        return assistant_reply, True
+
+    def _stream(self, contents, placeholder):
+        """Streams one response into the placeholder; returns its text and any function-call parts."""
+        # The spinner only covers the wait for the first chunk, including any retries; the
+        # request itself runs on the shared event loop so the async client's connections are reused
+        with st.spinner("Thinking..."):
+            response = run(open_stream(
+                self.limiter,
+                self.client.aio.models.generate_content_stream,
+                model=GEMINI_MODEL,
+                contents=contents,
+                config=self.config,
+            ))
+
+        # Render chunks as they arrive instead of waiting for the full reply
+        assistant_reply = ""
+        function_calls = []
+        for chunk in iterate(response):
+            # Chunks carrying only metadata (finish reason, usage) have no content
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
+                if part.function_call:
+                    function_calls.append(part)
+                elif part.text:
+                    assistant_reply += part.text
+                    placeholder.markdown(assistant_reply)
+        return assistant_reply.strip(), function_calls
+
+
+@st.fragment
+def render_history(messages, key):
+    """Draws the latest messages of a conversation, and the older ones only when asked for.
+
+    As a fragment, flipping the toggle reruns just this history rather than the whole page.
+    """
+    hidden = len(messages) - RENDERED_MESSAGES
+    if hidden > 0 and not st.toggle(f"Show {hidden} earlier messages", key=f"show_earlier:{key}"):
+        messages = messages[hidden:]
+    for msg in messages:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+
+async def run_tool(tool_call):
+    """Executes a single merged tool call without blocking the event loop."""
+    # Arguments arrive as a JSON string, not a parsed object
+    return await asyncio.to_thread(call_tool, tool_call["name"], tool_call["arguments"])
+
+
+async def run_tools(tool_calls):
+    """Executes all tool calls of a turn concurrently, preserving their order."""
+    return await asyncio.gather(*(run_tool(tool_call) for tool_call in tool_calls))
+
+
+def run_chatbot(title, system_prompt, provider="gemini", tools=(get_time, calculate)):
+    """Renders a chat page that answers with the given system prompt, provider and tools."""
+    settings = PROVIDERS[provider]
+    st.set_page_config(page_title=settings["page_title"], page_icon="🤖", layout="wide")
+    st.title(title)
+
+    api_key = get_api_key(provider)
+    limiter = get_rate_limiter(provider)
+    chat_class = GroqChat if provider == "groq" else GeminiChat
+    chat = chat_class(api_key, system_prompt, limiter, [tool.__name__ for tool in tools])
+    response_cache = get_response_cache(system_prompt)
+    chat_store = get_chat_store()
+    session_id = get_session_id()
+
+    # Bots served from one hub share a session, so each keeps its history under its own key.
+    # Alongside it sits the same conversation already formatted for the provider, appended
+    # one message at a time so a turn doesn't reformat the whole history.
+    bot = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+    history_key = "messages:" + bot
+    payload_key = history_key + ":payload"
+    if history_key not in st.session_state:
+        # A refreshed or returning session picks up its stored conversation
+        messages = chat_store.load(session_id, bot)
+        if not messages:
+            messages = [{"role": "assistant", "content": settings["greeting"]}]
+            chat_store.replace(session_id, bot, messages)
+        st.session_state[history_key] = messages
+        st.session_state[payload_key] = [chat.to_payload(msg) for msg in messages]
+
+    # Offline bulk prompts go through Gemini Batch Mode instead of the chat loop
+    if provider == "gemini":
+        bulk_prompts_sidebar(get_gemini_client(api_key), system_prompt, key=history_key)
+
+    # Filled in place once a new reply's latency is known
+    latency_slot = st.sidebar.empty()
+    show_latency(latency_slot, bot)
+
+    def add_message(role, content):
+        msg = {"role": role, "content": content}
+        st.session_state[history_key].append(msg)
+        st.session_state[payload_key].append(chat.to_payload(msg))
+        chat_store.append(session_id, bot, role, content)
+
+    # Display chat history
+    render_history(st.session_state[history_key], key=bot)
+
+    # Handle User Input
+    user_input = st.chat_input("Ask me anything...")
+    if not user_input:
+        return
+
+    # A double submit, or a resend after an interrupted or failed turn, repeats a message that
+    # never got its reply; it is answered once instead of being stored and sent twice
+    if st.session_state[history_key][-1] != {"role": "user", "content": user_input}:
+        add_message("user", user_input)
+        with st.chat_message("user"):
+            st.markdown(user_input)
+    started = time.perf_counter()
+
+    # Serve repeated or paraphrased questions without calling the model; follow-ups are only
+    # served after the same conversation, so one user's context never answers another's
+    context = conversation_context(st.session_state[history_key])
+    cached_reply = response_cache.get(user_input, context)
+    if cached_reply is not None:
+        add_message("assistant", cached_reply)
+        with st.chat_message("assistant"):
+            st.markdown(cached_reply)
+        record_latency(bot, "cache", time.perf_counter() - started)
+        show_latency(latency_slot, bot)
+        return
+
+    # Fold older turns into a summary so each request stays within the token budget
+    messages = compact(
+        st.session_state[history_key], chat.summarize, settings["context_window"], reserved=chat.system_tokens()
+    )
+    if messages is not st.session_state[history_key]:
+        st.session_state[history_key] = messages
+        st.session_state[payload_key] = [chat.to_payload(msg) for msg in messages]
+        chat_store.replace(session_id, bot, messages)
+
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        # Only the latest turns are sent; the full history stays on screen
+        payload = window(messages, payload=st.session_state[payload_key])
+        assistant_reply, cacheable = chat.reply(payload, placeholder)
+        if cacheable:
+            response_cache.put(user_input, assistant_reply, context)
+
+        add_message("assistant", assistant_reply)
+        placeholder.markdown(assistant_reply)
+    record_latency(bot, "model", time.perf_counter() - started)
+    show_latency(latency_slot, bot)
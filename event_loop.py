@@ -0,0 +1,40 @@
+"""
+Shared asyncio event loop for the Streamlit chatbots.
+
+Streamlit runs every script rerun in a fresh thread, and async LLM clients keep
+connection pools bound to the loop that first used them. Driving all coroutines
+on one long-lived loop lets those pools be reused across turns, while results
+are handed back to the script thread so Streamlit elements can still be drawn.
+"""
+
+import asyncio
+import threading
+
+import streamlit as st
+
+
+@st.cache_resource
+def get_event_loop():
+    """Starts the process-wide event loop in a background thread."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+
+def run(coro):
+    """Runs a coroutine on the shared loop and blocks until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+def iterate(aiterable):
+    """Yields the items of an async iterable on the calling thread."""
+    iterator = aiter(aiterable)
+
+    async def next_item():
+        return await anext(iterator)
+
+    while True:
+        try:
+            yield run(next_item())
+        except StopAsyncIteration:
+            return
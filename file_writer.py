@@ -0,0 +1,62 @@
+"""
+Background file saves.
+
+Rewriting a file on the script thread holds up the rerun that triggered it, and
+a burst of changes (several feedback entries in a row) would rewrite the same
+file once per change. Saves are instead queued to one writer
+thread, which waits briefly for more and runs only one save per file of each
+batch. A save reads the current data when it runs, so coalescing loses nothing.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+WRITE_DELAY = 0.25  # Seconds a batch stays open for further saves of the same files
+
+
+@st.cache_resource
+def get_write_queue():
+    """Starts the process-wide writer thread and returns the queue it takes saves from."""
+    writes = queue.Queue()
+    threading.Thread(target=_writer_loop, args=(writes,), name="file-writer", daemon=True).start()
+    # Saves still queued at shutdown are finished before the process exits
+    atexit.register(writes.join)
+    return writes
+
+
+def schedule_write(filename, save):
+    """Queues save() to run on the writer thread; it replaces a save of the same file queued just before.
+
+    The writer thread has no Streamlit script context, so save() can't show anything to the
+    user; it has to record a failure for the next rerun to report.
+    """
+    get_write_queue().put((filename, save))
+
+
+def _writer_loop(writes):
+    while True:
+        filename, save = writes.get()
+        batch = {filename: save}
+        received = 1
+        deadline = time.monotonic() + WRITE_DELAY
+        while (timeout := deadline - time.monotonic()) > 0:
+            try:
+                filename, save = writes.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch[filename] = save
+            received += 1
+        for filename, save in batch.items():
+            try:
+                save()
+            except Exception:
+                logger.exception("Background save of %s failed", filename)
+        for _ in range(received):
+            writes.task_done()
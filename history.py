@@ -0,0 +1,57 @@
+"""
+Conversation history compaction.
+
+Once a conversation approaches the per-request token budget, everything but the
+most recent turns is folded into a single summary message, so each request stays
+bounded by the window instead of growing with the whole session. Requests also
+only carry a sliding window of the latest messages, so a long chat of short turns
+costs a constant amount per request even before it is summarized.
+"""
+
+WINDOW = 20  # Messages sent with each request, not counting the summary
+SUMMARY_TOKENS = 256  # Room left for the summary when checking that compaction fits the budget
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+SUMMARY_INSTRUCTION = (
+    "Summarize the following conversation in a few sentences. Keep any facts, "
+    "preferences and open questions the assistant will need later.\n\n"
+)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate of roughly four characters per token."""
+    return len(text) // 4 + 1
+
+
+def compact(messages, summarize, model_ctx, keep_last=6, threshold=0.9, reserved=0):
+    """Replaces all but the last keep_last messages with one summary once the history nears the budget.
+
+    summarize is called with the summarization prompt and returns the summary text.
+    model_ctx is the model's context window and reserved the number of tokens already taken by
+    the system prompt; the history is budgeted the rest of threshold * model_ctx.
+    """
+    if len(messages) <= keep_last:
+        return messages
+    budget = threshold * model_ctx - reserved
+    if sum(estimate_tokens(msg["content"]) for msg in messages) <= budget:
+        return messages
+
+    older, recent = messages[:-keep_last], messages[-keep_last:]
+    # A summary that can't bring the history under budget would cost a call on every turn for nothing
+    if SUMMARY_TOKENS + sum(estimate_tokens(msg["content"]) for msg in recent) > budget:
+        return messages
+    transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in older)
+    summary = summarize(SUMMARY_INSTRUCTION + transcript)
+    return [{"role": "system", "content": SUMMARY_PREFIX + summary.strip()}] + recent
+
+
+def window(messages, size=WINDOW, payload=None):
+    """Returns the last size messages for a request, keeping a leading summary message.
+
+    With payload, a list kept parallel to messages, the matching payload entries are returned instead.
+    """
+    items = messages if payload is None else payload
+    if len(messages) <= size:
+        return items
+    if messages[0]["content"].startswith(SUMMARY_PREFIX):
+        return [items[0]] + items[-size:]
+    return items[-size:]
@@ -0,0 +1,21 @@
+"""
+Serves every chatbot from one Streamlit process:
+
+    streamlit run hub.py
+
+The bots then share the LLM clients, response cache, rate limiters and event
+loop instead of each `streamlit run` keeping its own copies.
+"""
+
+import streamlit as st
+
+pages = [
+    st.Page("app.py", title="Calculator"),
+    st.Page("app_groq.py", title="Travel (Groq)"),
+    st.Page("bus.py", title="Bus"),
+    st.Page("clg.py", title="College"),
+    st.Page("fail.py", title="Failure detection"),
+    st.Page("new.py", title="Healthcare"),
+]
+
+st.navigation(pages).run()
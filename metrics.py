@@ -0,0 +1,45 @@
+"""
+Reply latency tracking.
+
+Each reply's latency is kept in the session for the sidebar and appended to
+latency.csv, so regressions (throttling, cache misses, prompt growth) can be
+spotted and the caching and windowing settings tuned against real numbers.
+"""
+
+import csv
+import statistics
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+
+LATENCY_LOG = Path("latency.csv")
+MAX_LOG_BYTES = 1_000_000  # The log is rotated to latency.csv.1 past this size
+
+_log_lock = threading.Lock()
+
+
+def record_latency(bot, source, seconds):
+    """Records how long a reply took; source is "model" or "cache"."""
+    st.session_state.setdefault(f"latencies:{bot}", []).append(seconds)
+    with _log_lock:
+        if LATENCY_LOG.exists() and LATENCY_LOG.stat().st_size > MAX_LOG_BYTES:
+            LATENCY_LOG.replace(LATENCY_LOG.with_name(LATENCY_LOG.name + ".1"))
+        is_new = not LATENCY_LOG.exists()
+        with LATENCY_LOG.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(["timestamp", "bot", "source", "seconds"])
+            writer.writerow([datetime.now().isoformat(timespec="seconds"), bot, source, f"{seconds:.3f}"])
+
+
+def show_latency(slot, bot):
+    """Shows the bot's last reply latency in a placeholder, with the session median as help text."""
+    latencies = st.session_state.get(f"latencies:{bot}")
+    if latencies:
+        slot.metric(
+            "Last latency (s)",
+            f"{latencies[-1]:.2f}",
+            help=f"Median over {len(latencies)} replies: {statistics.median(latencies):.2f}s",
+        )
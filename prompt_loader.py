@@ -0,0 +1,16 @@
+"""
+System prompts for the chatbots, kept as text files under prompts/ instead of
+multi-kilobyte string literals in each script.
+"""
+
+from pathlib import Path
+
+import streamlit as st
+
+PROMPT_DIR = Path(__file__).with_name("prompts")
+
+
+@st.cache_data
+def load_prompt(name):
+    """Returns the system prompt stored in prompts/<name>.txt, read from disk once."""
+    return (PROMPT_DIR / f"{name}.txt").read_text(encoding="utf-8")
@@ -0,0 +1,55 @@
+"""
+Client-side rate limiting for LLM requests.
+
+A token bucket paces requests under the provider's requests-per-minute quota, so
+a burst waits briefly instead of failing with 429 and going through retries, and
+a semaphore caps how many requests are in flight at once.
+"""
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Async token bucket refilled at rpm tokens per minute, with a concurrency cap.
+
+    The bucket holds at most burst tokens, so no rolling minute sees more than
+    rpm + burst requests.
+    """
+
+    def __init__(self, rpm, burst=2, max_concurrent=5):
+        self.rpm = rpm
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self):
+        """Waits until a request token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rpm / 60)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * 60 / self.rpm)
+
+    async def limit(self, coro):
+        """Awaits a request coroutine once the limiter admits it."""
+        async with self:
+            return await coro
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
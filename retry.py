@@ -0,0 +1,68 @@
+"""
+Retries for transient LLM API errors.
+
+Rate-limit and server-side errors are retried with exponential backoff and
+jitter instead of surfacing to the user, who would otherwise have to send the
+message again. Streams are retried only until their first chunk arrives, since
+once output has been shown a request can't be replayed invisibly.
+"""
+
+import tenacity
+
+RETRYABLE_STATUS = {429, 500, 503}
+
+
+def is_transient(exc):
+    """True for rate-limit and server errors from either SDK."""
+    # google-genai's APIError carries the HTTP status as code, Groq's errors as status_code
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return isinstance(status, int) and status in RETRYABLE_STATUS
+
+
+# Waits about 10s, 20s, 40s, ... (capped at 320s) between up to 6 attempts
+retry_transient = tenacity.retry(
+    wait=tenacity.wait_exponential_jitter(initial=10, max=320),
+    stop=tenacity.stop_after_attempt(6),
+    retry=tenacity.retry_if_exception(is_transient),
+    reraise=True,
+)
+
+
+@retry_transient
+async def call(limiter, request, **kwargs):
+    """Awaits request(**kwargs) once the limiter admits it, retrying transient errors."""
+    return await limiter.limit(request(**kwargs))
+
+
+@retry_transient
+async def open_stream(limiter, request, **kwargs):
+    """Starts a streamed request under the limiter and returns an async iterator over its chunks.
+
+    The first chunk is awaited here, so a request that fails before producing
+    any output is retried.
+    """
+    async with limiter:
+        iterator = aiter(await request(**kwargs))
+        first = await anext(iterator, None)
+    return _prepend(first, iterator)
+
+
+@retry_transient
+def open_stream_sync(request, *args, **kwargs):
+    """Blocking counterpart of open_stream() for synchronous streaming calls."""
+    iterator = iter(request(*args, **kwargs))
+    first = next(iterator, None)
+    return _prepend_sync(first, iterator)
+
+
+async def _prepend(first, iterator):
+    if first is not None:
+        yield first
+    async for item in iterator:
+        yield item
+
+
+def _prepend_sync(first, iterator):
+    if first is not None:
+        yield first
+    yield from iterator
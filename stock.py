@@ -1,76 +1,67 @@
 import streamlit as st
 import os
-import google.generativeai as genai
+import time
 from datetime import datetime
+from typing import Final
+from cache import conversation_context
+from chat_store import get_session_id
+from chatbot import get_chat_store, get_gemini_client, get_gemini_config, get_response_cache, render_history
+from history import WINDOW
+from metrics import record_latency, show_latency
+from prompt_loader import load_prompt
+from retry import open_stream_sync
 # import json # Json is not strictly needed for this basic GenAI interaction but good to have if parsing API responses later
 
 # --- Configuration ---
 # IMPORTANT: Set your Google API Key as an environment variable
 # Example: export GOOGLE_API_KEY='YOUR_API_KEY' (in Linux/macOS)
-# Or set it directly (less secure): genai.configure(api_key="YOUR_API_KEY")
-try:
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        st.error("⚠️ Google API Key not found. Please set the GOOGLE_API_KEY environment variable.")
-        st.stop()
-    genai.configure(api_key=api_key)
-except Exception as e:
-    st.error(f"Error configuring Google AI: {e}")
+# Or set it directly (less secure): api_key = "YOUR_API_KEY"
+api_key = os.getenv("GOOGLE_API_KEY")
+if not api_key:
+    st.error("⚠️ Google API Key not found. Please set the GOOGLE_API_KEY environment variable.")
     st.stop()
 
 # --- Constants ---
-MODEL_NAME = "gemini-1.5-flash" # Or choose another suitable model like "gemini-pro"
-SYSTEM_PROMPT = """
-You are "MarketMind," a highly knowledgeable and analytical AI assistant specializing in the stock market and finance. Your purpose is to educate users and provide comprehensive information based on your training data, up to your last knowledge update.
-
-**Core Knowledge Areas:**
-*   **Stock Market Fundamentals:** Explain exchanges (NYSE, NASDAQ, LSE, etc.), key ratios (P/E, EPS, ROE), market cap, dividends, earnings reports, and stock types (blue-chip, growth, value).
-*   **Technical Analysis Concepts:** Describe indicators (Moving Averages, RSI, MACD, Bollinger Bands) and chart patterns (head and shoulders, flags, etc.). Explain *how* they are *used* for analysis, but do not perform real-time technical analysis on specific stocks unless provided with the necessary data and tools (which you currently lack).
-*   **Fundamental Analysis Concepts:** Explain how to analyze company health using financial statements (income statement, balance sheet, cash flow). Discuss key metrics (earnings growth, debt-to-equity, free cash flow) and valuation methods (DCF, relative valuation). Do not perform real-time fundamental analysis on specific companies without access to live, detailed financial data feeds.
-*   **Investment Strategies:** Discuss strategies based on risk profiles (conservative to aggressive), diversification, portfolio theory, risk management, passive vs. active investing.
-*   **Market Trends & Economic Indicators:** Explain the impact of GDP, inflation, unemployment, interest rates, market cycles, and business cycles on the stock market based on historical patterns and economic theory.
-*   **Stock Trading Mechanics:** Explain order types (market, limit, stop-loss), trading styles (day trading, swing trading, long-term), margin trading, and options basics.
-*   **Risk Management & Portfolio Building Concepts:** Discuss asset allocation, risk-adjusted returns, and strategies for minimizing losses.
-*   **Cryptocurrency & Alternative Investments (General Info):** Provide general information on crypto correlations with stocks, different cryptocurrencies/technologies, and alternatives like real estate, commodities, and bonds, based on your training data.
-*   **Stock Market News & Events Interpretation:** Explain the *potential* impact of major news (geopolitical, economic policy changes, central bank actions, earnings surprises) on market sentiment and specific stocks, based on historical precedent and financial principles.
-
-**Behavior and Constraints:**
-*   **Act as an Educator/Informant:** Your primary role is to explain concepts, historical context, and analytical methods.
-*   **Neutral and Professional:** Maintain an objective, data-driven tone. Avoid personal opinions or biases.
-*   **Clarity:** Use clear language, but provide technical depth when requested by advanced users.
-*   **No Financial Advice:** **Crucially, you MUST NOT provide financial advice, investment recommendations, or tell users whether to buy/sell/hold specific assets.** Always include a disclaimer stating you are an AI, cannot give financial advice, and users should consult qualified professionals and do their own research.
-*   **Acknowledge Limitations:** You do NOT have real-time stock price data, live news feeds, or the capability to execute trades or perform complex, up-to-the-minute technical or fundamental analysis on specific stocks *unless* integrated with external tools/APIs (which are not assumed by default). Base your answers on your existing knowledge base. If asked for live data or analysis you cannot perform, state this limitation clearly.
-*   **Cite Sources (Conceptually):** While you can't browse live URLs, mention reliable sources like financial news outlets (Bloomberg, Reuters, WSJ), regulatory filings (SEC EDGAR), or academic research when discussing general principles, if appropriate.
-
-**Interaction Style:**
-*   Answer specific questions clearly (e.g., "What is a P/E ratio?").
-*   Provide conceptual analysis based on the information given (e.g., "Explain the potential factors affecting Tech Company X based on typical industry trends and its last reported earnings type").
-*   Explain *how* one *would* forecast or analyze, rather than giving definitive predictions.
-
-Your goal is to be an informative, reliable, and safe resource for learning about the stock market.
-"""
+MODEL_NAME = "models/gemini-1.5-flash-001" # Context caching needs an explicit model version
+STORE_KEY = "stock" # This bot's conversations in the shared chat store
+SYSTEM_PROMPT: Final[str] = load_prompt("marketmind")
 
 # --- Model and Chat Initialization ---
+# Built once per process instead of on every Streamlit rerun, with the system prompt
+# held in a provider-side context cache; each browser session gets its own chat session below
 try:
-    model = genai.GenerativeModel(
-        MODEL_NAME,
-        system_instruction=SYSTEM_PROMPT, # Use the detailed prompt as system instruction
-        # safety_settings=... # Optional: configure safety settings if needed
-        # generation_config=... # Optional: configure temperature, top_p, etc.
-    )
+    client = get_gemini_client(api_key)
+    config = get_gemini_config(api_key, SYSTEM_PROMPT, model_name=MODEL_NAME)
 except Exception as e:
-    st.error(f"Error creating Generative Model: {e}")
+    st.error(f"Error configuring Google AI: {e}")
     st.stop()
 
+def new_chat(history=()):
+    """Starts a chat session on the current config, which is rebuilt before its context cache expires."""
+    return client.chats.create(model=MODEL_NAME, config=config, history=list(history))
+
+# Repeated or paraphrased questions are answered from a local cache
+response_cache = get_response_cache(SYSTEM_PROMPT)
+
+# Conversations are also stored on disk, so a refreshed or returning session picks up where it left off
+chat_store = get_chat_store()
+session_id = get_session_id()
+
+def add_message(role, content):
+    st.session_state.messages.append({"role": role, "content": content})
+    chat_store.append(session_id, STORE_KEY, role, content)
+
 # Initialize chat history in Streamlit session state
+if "messages" not in st.session_state:
+    st.session_state.messages = chat_store.load(session_id, STORE_KEY) # Store {role: "user"/"model", content: "message text"}
 if "chat_session" not in st.session_state:
     try:
-        st.session_state.chat_session = model.start_chat(history=[])
+        st.session_state.chat_session = new_chat(
+            {"role": msg["role"], "parts": [{"text": msg["content"]}]} for msg in st.session_state.messages
+        )
     except Exception as e:
         st.error(f"Error starting chat session: {e}")
         st.stop()
-if "messages" not in st.session_state:
-    st.session_state.messages = [] # Store {role: "user"/"model", content: "message text"}
 
 # --- Streamlit UI ---
 st.set_page_config(page_title="MarketMind Chatbot", layout="wide")
@@ -86,48 +77,79 @@ st.warning(
 )
 
 # Display chat history
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"]) # Use markdown for better formatting
+render_history(st.session_state.messages, key=STORE_KEY)
 
 # Get user input
 user_prompt = st.chat_input("Ask me about the stock market...")
 
 if user_prompt:
-    # Add user message to history and display it
-    st.session_state.messages.append({"role": "user", "content": user_prompt})
-    with st.chat_message("user"):
-        st.markdown(user_prompt)
-
-    # Send prompt to Generative AI and get response
-    try:
-        with st.spinner("MarketMind is thinking..."):
-            chat = st.session_state.chat_session
-            response = chat.send_message(user_prompt) # Stream=True for streaming effect
-
-            # Add AI response to history and display it
-            ai_response_text = response.text
-            st.session_state.messages.append({"role": "model", "content": ai_response_text})
-            with st.chat_message("model"):
-                st.markdown(ai_response_text)
-
-    except Exception as e:
-        st.error(f"An error occurred while getting the response: {e}")
-        # Optionally add an error message to the chat history
-        error_message = f"Sorry, I encountered an error trying to respond: {e}"
-        st.session_state.messages.append({"role": "model", "content": error_message})
+    # Add user message to history and display it, unless it repeats the last, unanswered one
+    # (a double submit or a resend after an interrupted turn), which is answered once instead
+    if st.session_state.messages[-1:] != [{"role": "user", "content": user_prompt}]:
+        add_message("user", user_prompt)
+        with st.chat_message("user"):
+            st.markdown(user_prompt)
+    started = time.perf_counter()
+
+    # Serve repeated or paraphrased questions without calling the model
+    # Follow-ups are only served after the same conversation, so one user's context never answers another's
+    context = conversation_context(st.session_state.messages)
+    cached_reply = response_cache.get(user_prompt, context)
+    if cached_reply is not None:
+        # Keep the model's view of the conversation in step with what is on screen
+        st.session_state.chat_session = new_chat([
+            *st.session_state.chat_session.get_history(curated=True),
+            {"role": "user", "parts": [{"text": user_prompt}]},
+            {"role": "model", "parts": [{"text": cached_reply}]},
+        ])
+        add_message("model", cached_reply)
         with st.chat_message("model"):
-            st.markdown(error_message)
+            st.markdown(cached_reply)
+        record_latency(STORE_KEY, "cache", time.perf_counter() - started)
+    else:
+        # Send prompt to Generative AI and get response
+        try:
+            with st.chat_message("model"):
+                # The spinner only covers the wait for the first chunk
+                with st.spinner("MarketMind is thinking..."):
+                    # Only the latest turns are sent; the full history stays on screen
+                    chat = new_chat(st.session_state.chat_session.get_history(curated=True)[-WINDOW:])
+                    st.session_state.chat_session = chat
+                    # Rate-limit and server errors are retried with backoff until the first chunk arrives
+                    response = open_stream_sync(chat.send_message_stream, user_prompt)
+
+                # Render chunks as they arrive instead of waiting for the full reply
+                placeholder = st.empty()
+                chunks = []
+                for chunk in response:
+                    chunks.append(chunk.text or "")
+                    placeholder.markdown("".join(chunks))
+
+                # Add AI response to history
+                ai_response_text = "".join(chunks)
+                add_message("model", ai_response_text)
+                response_cache.put(user_prompt, ai_response_text, context)
+                record_latency(STORE_KEY, "model", time.perf_counter() - started)
+
+        except Exception as e:
+            st.error(f"An error occurred while getting the response: {e}")
+            # Optionally add an error message to the chat history
+            error_message = f"Sorry, I encountered an error trying to respond: {e}"
+            add_message("model", error_message)
+            with st.chat_message("model"):
+                st.markdown(error_message)
 
 # Optional: Add a button to clear chat history
 if st.sidebar.button("Clear Chat History"):
     st.session_state.messages = []
+    chat_store.replace(session_id, STORE_KEY, [])
     # Re-initialize the chat session on the backend as well
     try:
-        st.session_state.chat_session = model.start_chat(history=[])
+        st.session_state.chat_session = new_chat()
         st.rerun() # Rerun the app to reflect the cleared state
     except Exception as e:
         st.sidebar.error(f"Error clearing chat: {e}")
 
 st.sidebar.info(f"Using Model: {MODEL_NAME}")
+show_latency(st.sidebar.empty(), STORE_KEY)
 st.sidebar.info(f"Last Knowledge Update: Based on Google AI's training data cut-off.")
\ No newline at end of file
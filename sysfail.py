@@ -12,17 +12,45 @@ addressing potential error points.
 """
 
 import streamlit as st
+import atexit
 import os
-import google.generativeai as genai
+import threading
+from google.genai import types
 from datetime import datetime
+from enum import IntEnum
+from functools import lru_cache
 import json
 import random
-from collections import Counter
-import traceback # For logging detailed errors
+import re
+import sys
+from collections import Counter, defaultdict, deque
+from itertools import islice
+import logging
+from cache import conversation_context
+from chatbot import get_gemini_client, get_gemini_config, get_rate_limiter, get_response_cache
+from event_loop import run
+from file_writer import schedule_write
+from prompt_loader import load_prompt
+from retry import call
+
+try:
+    from orjson import OPT_APPEND_NEWLINE, OPT_INDENT_2, dumps as orjson_dumps, loads as json_loads
+except ImportError: # orjson is optional; the stdlib json module reads and writes the same files, only slower
+    orjson_dumps = None
+    json_loads = json.loads
+
+# Messages are only formatted when logging is configured to show their level (WARNING and up by default)
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 KNOWLEDGE_FILE = "knowledge_base_genai.json"
-LOG_FILE = "error_log_genai.json"
+LOG_FILE = "error_log_genai.jsonl" # One JSON object per line, appended as errors occur
+MAX_ERROR_LOGS = 10_000 # Older entries are dropped from memory, and from the file when it is next rewritten
+LOG_VIEW_ENTRIES = 50 # Newest entries shown by "View/Hide Error Log"
+FEEDBACK_COMPACT_THRESHOLD = 5 # Rewrite the log once this many entries have new feedback
+GENAI_MODEL = "gemini-1.5-flash" # Or another suitable model
+SYSTEM_PROMPT = load_prompt("self_aware") # Static prefix of every request
+CONTEXT_MESSAGES = 5 # Earlier messages a restarted chat session is given
 DEFAULT_FALLBACK_RESPONSES = [
     "I'm sorry, I encountered an issue or couldn't understand clearly. Could you please rephrase?",
     "Hmm, I'm having trouble with that request. Let's try something else.",
@@ -30,51 +58,185 @@ DEFAULT_FALLBACK_RESPONSES = [
 ]
 SIMULATED_FAILURE_RATE = 0.10 # 10% chance to simulate a failure for demo
 REFUSAL_PHRASES = ["i cannot", "i am unable", "i don't have information", "my apologies, but i", "as an ai", "i lack the ability"]
+# One case-insensitive scan finds any of the phrases, without lowercasing a copy of the response
+REFUSAL_RE = re.compile("|".join(map(re.escape, REFUSAL_PHRASES)), re.IGNORECASE)
+SKIPPED_FEEDBACK = ["skipped", "skipped_empty", "skipped_eof"] # Markers stored when no feedback was given
 
 # --- Helper Functions ---
 
+def json_bytes(data, indent=False):
+    """Encodes data as UTF-8 JSON, with orjson when it is installed."""
+    if orjson_dumps is not None:
+        return orjson_dumps(data, option=OPT_INDENT_2 if indent else None)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+def json_line(data):
+    """Encodes data as one UTF-8 JSON-Lines line, newline included."""
+    if orjson_dumps is not None:
+        # orjson appends the newline itself, instead of the line being copied to add it
+        return orjson_dumps(data, option=OPT_APPEND_NEWLINE)
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode('utf-8')
+
 def load_json_robust(filename, default_data):
     """Loads data from JSON, handles errors, returns default if issues."""
-    if not os.path.exists(filename):
-        print(f"INFO: File '{filename}' not found. Returning default.")
+    # Opened directly rather than checked for first, which would cost an extra stat per load
+    try:
+        with open(filename, 'rb') as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
+        logger.info("File '%s' not found. Returning default.", filename)
         # Save default data if file doesn't exist on first load
         save_json_robust(filename, default_data)
         return default_data
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        print(f"WARNING: Could not decode JSON from {filename}. Attempting recovery.")
+    except json.JSONDecodeError: # orjson.JSONDecodeError subclasses it
+        logger.warning("Could not decode JSON from %s. Attempting recovery.", filename)
         backup_filename = f"{filename}.bad_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         try:
             os.rename(filename, backup_filename)
-            print(f"INFO: Backed up corrupted file to {backup_filename}")
+            logger.info("Backed up corrupted file to %s", backup_filename)
         except OSError as bk_err:
-            print(f"ERROR: Could not backup corrupted file {filename}: {bk_err}")
+            logger.error("Could not backup corrupted file %s: %s", filename, bk_err)
         # Return default after failed load/backup
         return default_data
-    except Exception as e:
-        print(f"ERROR: Unexpected error loading {filename}: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Unexpected error loading %s", filename)
         return default_data
 
 def save_json_robust(filename, data):
     """Saves data to JSON, handles errors."""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        # print(f"DEBUG: Data saved to {filename}") # Optional
+        data_bytes = json_bytes(data, indent=True) # Encoded first, so a failure leaves the file intact
+        with open(filename, 'wb', buffering=1 << 20) as f:
+            f.write(data_bytes)
+        logger.debug("Data saved to %s", filename)
         return True
     except IOError as e:
-        print(f"ERROR: Could not write to file {filename}: {e}")
+        logger.error("Could not write to file %s: %s", filename, e)
         st.toast(f"Error saving data to {filename}!", icon="❌")
         return False
-    except Exception as e:
-        print(f"ERROR: Unexpected error saving {filename}: {e}")
+    except Exception:
+        logger.exception("Unexpected error saving %s", filename)
         st.toast(f"Error saving data to {filename}!", icon="❌")
-        traceback.print_exc()
         return False
 
+def load_jsonl_robust(filename, maxlen=None):
+    """Loads the last maxlen entries of a JSON-Lines file as a deque, skipping lines that can't be decoded."""
+    # Lines are decoded one at a time, so older entries are dropped as the file is read
+    entries = deque(maxlen=maxlen)
+    try:
+        with open(filename, 'rb', buffering=1 << 20) as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json_loads(line))
+                except ValueError: # Undecodable JSON or UTF-8
+                    # e.g. a line cut short by a crash mid-write; the other entries are still usable
+                    logger.warning("Skipping undecodable line %d in %s.", line_number, filename)
+    except FileNotFoundError:
+        logger.info("File '%s' not found. Starting with an empty list.", filename)
+    except Exception:
+        logger.exception("Unexpected error loading %s", filename)
+    return entries
+
+def save_jsonl_robust(filename, entries):
+    """Rewrites a JSON-Lines file from a list, handles errors."""
+    try:
+        with open(filename, 'wb', buffering=1 << 20) as f:
+            for entry in entries:
+                f.write(json_line(entry))
+        return True
+    except Exception:
+        logger.exception("Could not write to file %s", filename)
+        st.toast(f"Error saving data to {filename}!", icon="❌")
+        return False
+
+@lru_cache(maxsize=1024)
+def clean_input(text):
+    """Normalises user input for knowledge lookups and error tallies."""
+    # Interned, so a lookup of a stored key usually matches by identity without comparing characters
+    return sys.intern(text.lower().strip())
+
+def to_gemini_content(role, content):
+    """Converts one chat message for a Gemini chat history."""
+    # Not memoised: each chat keeps the mutable Content objects it is given, so they mustn't be
+    # shared between sessions, and building one costs nothing next to the request it goes into
+    # Gemini API expects 'user' and 'model' roles
+    if role == "assistant":
+        role = "model"
+    return types.Content(role=role, parts=[types.Part(text=content)])
+
+# Deletes every ASCII character that isn't a letter or digit
+NON_ALNUM = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isalnum()))
+
+def widget_key(text):
+    """Short widget-key fragment for a learning candidate."""
+    return text.translate(NON_ALNUM).lower()[:20]
+
+def is_user_feedback(feedback):
+    """True if feedback was actually given, not None or one of the skip/error markers."""
+    return bool(feedback) and feedback not in SKIPPED_FEEDBACK and not str(feedback).startswith("error:")
+
+# --- Response Classification ---
+class ResponseStatus(IntEnum):
+    OK = 0
+    REFUSAL = 1
+    SIMULATED_LOW_CONFIDENCE = 2
+    BLOCKED = 3
+    BAD_FORMAT = 4
+
+def classify_response(response):
+    """Returns the ResponseStatus of a GenAI response, along with its text."""
+    text = response.text if response else None # Computed once; the SDK joins the parts on every access
+    if not text:
+        block_reason = getattr(getattr(response, 'prompt_feedback', None), 'block_reason', None)
+        return (ResponseStatus.BLOCKED if block_reason else ResponseStatus.BAD_FORMAT), text
+    if REFUSAL_RE.search(text):
+        return ResponseStatus.REFUSAL, text
+    # Simulate random low confidence failure for the demo
+    if random.random() < SIMULATED_FAILURE_RATE:
+        return ResponseStatus.SIMULATED_LOW_CONFIDENCE, text
+    return ResponseStatus.OK, text
+
+# Each handler returns (error_type, sim_confidence, bot_response_text, genai_error_info)
+def _handle_ok(response, text):
+    return None, 1.0, text, None
+
+def _handle_refusal(response, text):
+    logger.debug("Detected potential refusal.")
+    # Optional: Use a fallback message instead of the refusal?
+    return "Refusal", 0.3, text, None
+
+def _handle_simulated_low_confidence(response, text):
+    logger.debug("Simulating low confidence failure.")
+    # Override response for demo
+    return "Simulated Low Confidence", random.uniform(0.1, 0.5), random.choice(DEFAULT_FALLBACK_RESPONSES), None
+
+def _handle_blocked(response, text):
+    # Handle cases where the content was blocked by safety filters
+    block_reason = response.prompt_feedback.block_reason
+    genai_error_info = f"Blocked due to {block_reason}"
+    logger.warning("GenAI content blocked: %s", genai_error_info)
+    return (
+        "Content Blocked",
+        0.1,
+        f"My response was blocked due to safety settings ({block_reason}). Please try phrasing differently.",
+        genai_error_info,
+    )
+
+def _handle_bad_format(response, text):
+    # Unexpected response structure from API
+    logger.error("Unexpected GenAI response format: %s", response)
+    return "API Response Format Error", 0.2, random.choice(DEFAULT_FALLBACK_RESPONSES), "Unexpected GenAI response structure"
+
+RESPONSE_HANDLERS = {
+    ResponseStatus.OK: _handle_ok,
+    ResponseStatus.REFUSAL: _handle_refusal,
+    ResponseStatus.SIMULATED_LOW_CONFIDENCE: _handle_simulated_low_confidence,
+    ResponseStatus.BLOCKED: _handle_blocked,
+    ResponseStatus.BAD_FORMAT: _handle_bad_format,
+}
+
 # --- SelfAwareChatbot Class (Stateful Logic) ---
 class SelfAwareChatbotStreamlit:
     DEFAULT_KNOWLEDGE = {
@@ -84,9 +246,25 @@ class SelfAwareChatbotStreamlit:
     def __init__(self, knowledge_file=KNOWLEDGE_FILE, log_file=LOG_FILE):
         self.knowledge_file = knowledge_file
         self.log_file = log_file
+        self._lock = threading.RLock()
         self.learned_knowledge = load_json_robust(self.knowledge_file, default_data=self.DEFAULT_KNOWLEDGE.copy())
-        self.error_logs = load_json_robust(self.log_file, default_data=[])
-        print(f"INFO: Chatbot instance initialized/reloaded. Knowledge items: {len(self.learned_knowledge)}, Error logs: {len(self.error_logs)}.")
+        if isinstance(self.learned_knowledge, dict):
+            # Keys are normalised like the input they're matched against, even if the file was hand-edited
+            self.learned_knowledge = {clean_input(key): response for key, response in self.learned_knowledge.items()}
+        self.error_logs = load_jsonl_robust(self.log_file, maxlen=MAX_ERROR_LOGS)
+        self._first_index = 0 # Log index of self.error_logs[0]; indices stay valid as old entries drop
+        self._pending_feedback = 0 # Entries whose feedback isn't on disk yet
+        self.log_version = 0 # Bumped on every change to the log, so views of it know when to refresh
+        self.save_failure = None # Set when a background save fails; shown on the next rerun
+        # Errors are appended through one buffered handle instead of rewriting the whole log each time
+        self._log_fh = open(self.log_file, 'ab', buffering=65536)
+        atexit.register(self.flush_log)
+        # analyze_errors reports running tallies, so it doesn't rescan the whole log each time;
+        # they cover every error since the log was loaded or cleared, including dropped ones
+        self._reset_counts()
+        for log in self.error_logs:
+            self._count_entry(log)
+        logger.info("Chatbot instance initialized. Knowledge items: %d, Error logs: %d.", len(self.learned_knowledge), len(self.error_logs))
 
     def log_error(self, user_input, bot_response, error_type, confidence=None, genai_error=None):
         """Logs an error interaction."""
@@ -99,114 +277,119 @@ class SelfAwareChatbotStreamlit:
             "genai_error_details": str(genai_error) if genai_error else None,
             "feedback_provided": None
         }
-        # Ensure logs are always a list
-        if not isinstance(self.error_logs, list):
-             print(f"WARNING: Error logs were not a list ({type(self.error_logs)}). Resetting.")
-             self.error_logs = []
-        self.error_logs.append(log_entry)
-        print(f"DEBUG: Logging error - Type: {error_type}, Input: '{user_input}'")
-        if save_json_robust(self.log_file, self.error_logs):
-            return len(self.error_logs) - 1 # Return index only if save succeeded
-        else:
-             # If save failed, potentially remove the log entry from memory too?
-             # Or just signal failure. For now, just return None.
-             return None
+        # Sessions share this instance, so changes to the log and its tallies are serialised
+        with self._lock:
+            if len(self.error_logs) == self.error_logs.maxlen:
+                 self._first_index += 1 # The append below drops the oldest entry
+            self.error_logs.append(log_entry)
+            self.log_version += 1
+            self._count_entry(log_entry)
+            logger.debug("Logging error - Type: %s, Input: %r", error_type, user_input)
+            try:
+                self._log_fh.write(json_line(log_entry))
+            except (OSError, ValueError) as e: # ValueError if the handle was closed
+                logger.error("Could not append to %s: %s", self.log_file, e)
+                st.toast(f"Error saving data to {self.log_file}!", icon="❌")
+                return None
+            return self._first_index + len(self.error_logs) - 1 # Return index only if the write succeeded
 
     def add_feedback_to_log(self, log_index, feedback):
         """Adds user feedback to a specific log entry."""
-        if isinstance(self.error_logs, list) and 0 <= log_index < len(self.error_logs):
-            self.error_logs[log_index]["feedback_provided"] = feedback
-            print(f"INFO: Feedback added to log index {log_index}")
-            return save_json_robust(self.log_file, self.error_logs) # Return True if save successful
-        else:
-            print(f"ERROR: Invalid log index ({log_index}) or logs not a list.")
-            st.error("Failed to save feedback - log index invalid.")
-            return False
+        with self._lock:
+            position = log_index - self._first_index
+            if 0 <= position < len(self.error_logs):
+                log = self.error_logs[position]
+                # Each entry counts once towards the inputs users gave feedback on
+                user_input_clean = clean_input(str(log.get('user_input', '')))
+                if user_input_clean and is_user_feedback(feedback) and not is_user_feedback(log.get('feedback_provided')):
+                    self._inputs_with_feedback[user_input_clean] += 1
+                log["feedback_provided"] = feedback
+                self.log_version += 1
+                logger.info("Feedback added to log index %d", log_index)
+                # Feedback changes a line already written, so it reaches disk when the log is next rewritten
+                self._pending_feedback += 1
+                if self._pending_feedback >= FEEDBACK_COMPACT_THRESHOLD:
+                    schedule_write(self.log_file, self._compact_log_in_background)
+                return True
+            else:
+                logger.error("Invalid log index (%s), or the entry was already dropped.", log_index)
+                st.error("Failed to save feedback - log index invalid.")
+                return False
 
-    def generate_response(self, user_input, chat_history):
-        """Generates response via GenAI, handles errors, simulates failures."""
+    def generate_response(self, user_input, chat_history, client, config, limiter, response_cache):
+        """Generates response via GenAI, handles errors, simulates failures.
+
+        The client, config, rate limiter and response cache are passed in on every call: this instance
+        outlives the script run that created it, and the config is rebuilt when its context cache expires.
+        """
         error_log_index = None
         bot_response_text = random.choice(DEFAULT_FALLBACK_RESPONSES)
         error_type = None
         genai_error_info = None
         sim_confidence = 1.0
 
-        cleaned_input = user_input.lower().strip()
+        cleaned_input = clean_input(user_input)
         if not cleaned_input:
             return "Please provide some input!", None # Handle empty input case
 
         # Check learned knowledge first (simple override)
         if cleaned_input in self.learned_knowledge:
              bot_response_text = self.learned_knowledge[cleaned_input]
-             print(f"DEBUG: Used learned response for '{cleaned_input}'")
+             logger.debug("Used learned response for %r", cleaned_input)
              # Decide if learned responses can also fail (for now, assume they succeed)
+             # The chat session never saw this reply, so the next turn rebuilds it from chat_history
+             st.session_state.pop("genai_chat", None)
              return bot_response_text, None
 
+        # Repeated or paraphrased questions are answered from the response cache without an API call;
+        # follow-ups only after the same conversation (chat_history ends with user_input)
+        cache_context = conversation_context(chat_history)
+        cached_reply = response_cache.get(user_input, cache_context)
+        if cached_reply is not None:
+             logger.debug("Used cached response for %r", cleaned_input)
+             st.session_state.pop("genai_chat", None)
+             return cached_reply, None
+
         # --- Call Google Generative AI ---
-        if 'genai_model' not in globals():
+        if client is None or config is None:
              st.error("GenAI Model not configured properly.")
              return "Error: AI Model not available.", None
 
         try:
-            # Simple context strategy (last 5 turns)
-            context_history = []
-            for msg in chat_history[-5:]: # Ensure format is correct for GenAI
-                 role = msg["role"]
-                 # Gemini API expects 'user' and 'model' roles
-                 if role == "assistant":
-                      role = "model"
-                 context_history.append({"role": role, "parts": [{"text": msg["content"]}]})
-
-            # Create a new chat session for each request (stateless approach)
-            # For conversational context, manage history more carefully
-            # Note: This simple history might not be ideal for long conversations
-            # For true chat, use model.start_chat(history=...)
-            # Here, we are just sending history as part of the prompt content for simplicity
-            prompt_for_genai = "\n".join([f"{msg['role']}: {msg['parts'][0]['text']}" for msg in context_history])
-            prompt_for_genai += f"\nuser: {user_input}" # Add current input
-
-            # print(f"DEBUG: Sending to GenAI:\n{prompt_for_genai}") # Be cautious with PII
-            response = genai_model.generate_content(prompt_for_genai)
+            # The session's chat session sends only the new message after the static system prompt,
+            # so requests share a prefix the provider can cache. Once it holds twice the context
+            # window, the config was rebuilt, or it was dropped because a turn's reply didn't come
+            # from it, it is restarted on the latest messages (chat_history ends with user_input).
+            # It uses the async client, whose connection pool stays open on the shared event loop.
+            chat = st.session_state.get("genai_chat")
+            if (
+                chat is None
+                or st.session_state.get("genai_chat_config") is not config
+                or len(chat.get_history(curated=True)) >= 2 * CONTEXT_MESSAGES
+            ):
+                chat = client.aio.chats.create(
+                    model=GENAI_MODEL,
+                    config=config,
+                    history=[to_gemini_content(msg["role"], msg["content"]) for msg in chat_history[-CONTEXT_MESSAGES - 1:-1]],
+                )
+                st.session_state.genai_chat = chat
+                st.session_state.genai_chat_config = config
+
+            # Paced under the quota shared with the other Gemini bots; rate-limit and server errors
+            # are retried with backoff before being logged as API errors
+            response = run(call(limiter, chat.send_message, message=user_input))
 
             # --- Process Response & Detect Failures ---
-            if response and hasattr(response, 'text'):
-                bot_response_text = response.text
-
-                # 1. Check for refusal
-                if any(phrase in bot_response_text.lower() for phrase in REFUSAL_PHRASES):
-                    error_type = "Refusal"
-                    sim_confidence = 0.3
-                    print(f"DEBUG: Detected potential refusal.")
-                    # Optional: Use a fallback message instead of the refusal?
-                    # bot_response_text = random.choice(DEFAULT_FALLBACK_RESPONSES)
-
-                # 2. Simulate random low confidence failure
-                elif random.random() < SIMULATED_FAILURE_RATE:
-                    error_type = "Simulated Low Confidence"
-                    sim_confidence = random.uniform(0.1, 0.5)
-                    bot_response_text = random.choice(DEFAULT_FALLBACK_RESPONSES) # Override response for demo
-                    print(f"DEBUG: Simulating low confidence failure.")
-
-            elif response and hasattr(response, 'prompt_feedback') and response.prompt_feedback.block_reason:
-                 # Handle cases where the content was blocked by safety filters
-                 error_type = "Content Blocked"
-                 sim_confidence = 0.1
-                 genai_error_info = f"Blocked due to {response.prompt_feedback.block_reason}"
-                 bot_response_text = f"My response was blocked due to safety settings ({response.prompt_feedback.block_reason}). Please try phrasing differently."
-                 print(f"WARN: GenAI content blocked: {genai_error_info}")
-
-            else:
-                 # Unexpected response structure from API
-                 error_type = "API Response Format Error"
-                 sim_confidence = 0.2
-                 genai_error_info = "Unexpected GenAI response structure"
-                 bot_response_text = random.choice(DEFAULT_FALLBACK_RESPONSES)
-                 print(f"ERROR: Unexpected GenAI response format: {response}")
-
+            status, text = classify_response(response)
+            error_type, sim_confidence, bot_response_text, genai_error_info = RESPONSE_HANDLERS[status](response, text)
+            # A fallback shown in place of the model's reply would leave the chat session remembering
+            # an answer the user never saw
+            if bot_response_text != text:
+                st.session_state.pop("genai_chat", None)
 
         except Exception as e:
-            print(f"ERROR: Google Generative AI API call failed: {e}")
-            traceback.print_exc()
+            logger.exception("Google Generative AI API call failed")
+            st.session_state.pop("genai_chat", None)
             error_type = "API Error"
             genai_error_info = e
             sim_confidence = 0.0
@@ -224,126 +407,193 @@ class SelfAwareChatbotStreamlit:
             # Only set the index if logging was successful
             if log_idx is not None:
                  error_log_index = log_idx
+        else:
+            # Only replies that passed the failure checks are reused
+            response_cache.put(user_input, bot_response_text, cache_context)
 
 
         return bot_response_text, error_log_index
 
+    def _reset_counts(self):
+        """Empties the running tallies of the error log."""
+        self._error_counts = Counter()
+        self._inputs_by_error_type = defaultdict(Counter)
+        self._inputs_with_feedback = Counter()
+        self._top_input_per_type = {} # error type -> (count, input) of its most frequent input
+
+    def _count_entry(self, log):
+        """Adds one log entry to the running tallies."""
+        # Basic validation of log entry structure
+        if not isinstance(log, dict):
+            logger.warning("Skipping invalid log entry (not a dict): %r", log)
+            return
+        e_type = log.get('error_type', 'Unknown')
+        self._error_counts[e_type] += 1
+
+        user_input_clean = clean_input(str(log.get('user_input', '')))
+        if not user_input_clean:
+            return
+        inputs = self._inputs_by_error_type[e_type]
+        inputs[user_input_clean] += 1
+        # Counts only grow, so the most frequent input is tracked as a running max
+        if inputs[user_input_clean] > self._top_input_per_type.get(e_type, (0, None))[0]:
+            self._top_input_per_type[e_type] = (inputs[user_input_clean], user_input_clean)
+        if is_user_feedback(log.get('feedback_provided')):
+            self._inputs_with_feedback[user_input_clean] += 1
+
+    def recent_logs(self, count):
+        """Returns the newest count log entries, oldest first."""
+        with self._lock:
+            return list(islice(reversed(self.error_logs), count))[::-1]
+
+    def compact_log(self):
+        """Rewrites the log file from memory, saving any feedback added since the last rewrite."""
+        with self._lock:
+            self._log_fh.flush() # Buffered entries must not land after the rewritten file
+            if save_jsonl_robust(self.log_file, self.error_logs):
+                self._pending_feedback = 0
+                return True
+            return False
+
+    def _compact_log_in_background(self):
+        """Runs compact_log() on the writer thread, where a failure can't be shown to the user directly."""
+        if not self.compact_log():
+            with self._lock:
+                self.save_failure = f"Could not save feedback to {self.log_file}; it will be retried with the next feedback."
+
+    def pop_save_failure(self):
+        """Returns and forgets the message of the last failed background save, if any."""
+        with self._lock:
+            failure, self.save_failure = self.save_failure, None
+            return failure
+
+    def flush_log(self):
+        """Writes buffered log entries and pending feedback to disk; also runs at exit."""
+        with self._lock:
+            if self._pending_feedback:
+                self.compact_log()
+            else:
+                self._log_fh.flush()
+
     def analyze_errors(self):
         """Performs basic analysis on error logs. Returns analysis text & learning candidate."""
         analysis_output = ["--- Analyzing Error Logs ---"]
-        if not isinstance(self.error_logs, list) or not self.error_logs:
-            analysis_output.append("No errors logged or logs are invalid.")
+        if not self.error_logs:
+            analysis_output.append("No errors logged.")
             analysis_output.append("--- Analysis Complete ---")
             return "\n".join(analysis_output), None
 
-        error_counts = Counter()
-        # Initialize counters for specific error types we might want to analyze inputs for
-        inputs_by_error_type = {e_type: Counter() for e_type in ["Knowledge Gap", "Refusal", "Simulated Low Confidence", "API Error", "Content Blocked", "API Response Format Error"]}
-        inputs_with_feedback = Counter()
+        with self._lock:
+            # Tallies are kept up to date by log_error and add_feedback_to_log
+            error_counts = self._error_counts
+            top_input_per_type = self._top_input_per_type
+            inputs_with_feedback = self._inputs_with_feedback
 
-        for log in self.error_logs:
-             # Basic validation of log entry structure
-            if not isinstance(log, dict):
-                 print(f"WARNING: Skipping invalid log entry (not a dict): {log}")
-                 continue
-            e_type = log.get('error_type', 'Unknown')
-            error_counts[e_type] += 1
-
-            user_input_raw = log.get('user_input', '')
-            user_input_clean = user_input_raw.lower().strip()
-            if not user_input_clean: continue
-
-            # Add input to the counter for its specific error type
-            if e_type in inputs_by_error_type:
-                 inputs_by_error_type[e_type][user_input_clean] += 1
-            # Can add handling for 'Unknown' error types if needed
-
-            feedback = log.get('feedback_provided')
-            # Consider feedback valid if it's not None and not one of the skip markers
-            if feedback and feedback not in ["skipped", "skipped_empty", "skipped_eof"] and not str(feedback).startswith("error:"):
-                 inputs_with_feedback[user_input_clean] += 1
-
-        analysis_output.append("Error Type Summary:")
-        if not error_counts:
-             analysis_output.append(" - No errors found in logs.")
-        else:
-            for e_type, count in error_counts.most_common():
-                analysis_output.append(f"- {e_type}: {count} occurrence(s)")
-
-        # Identify potential learning candidate (most frequent input causing Refusal/Knowledge Gap)
-        learning_candidate = None
-        highest_freq = 1 # Only consider inputs that occurred more than once
-
-        # Check Refusals first, then Knowledge Gaps (can adjust priority)
-        candidate_types_priority = ["Refusal", "Knowledge Gap"]
-        for e_type in candidate_types_priority:
-             if e_type in inputs_by_error_type and inputs_by_error_type[e_type]:
-                  top_input_info = inputs_by_error_type[e_type].most_common(1)[0]
-                  top_input_str = top_input_info[0]
-                  top_input_count = top_input_info[1]
-                  analysis_output.append(f"\nMost frequent input for '{e_type}': '{top_input_str}' ({top_input_count} times)")
-                  if top_input_count > highest_freq:
-                       highest_freq = top_input_count
-                       learning_candidate = (e_type, top_input_str) # Store (type, input) tuple
-
-        if inputs_with_feedback:
-             analysis_output.append("\nInputs with User Feedback Provided (Top 5):")
-             for inp, count in inputs_with_feedback.most_common(5):
-                  analysis_output.append(f"- '{inp}' ({count} feedback instance(s))")
-             # Could prioritize learning based on feedback count as well
-             # Example: if inputs_with_feedback.most_common(1)[0][1] > highest_freq: ...
-
-        analysis_output.append("--- Analysis Complete ---")
-        return "\n".join(analysis_output), learning_candidate
+            analysis_output.append("Error Type Summary:")
+            if not error_counts:
+                 analysis_output.append(" - No errors found in logs.")
+            else:
+                for e_type, count in error_counts.most_common():
+                    analysis_output.append(f"- {e_type}: {count} occurrence(s)")
+
+            # Identify potential learning candidate (most frequent input causing Refusal/Knowledge Gap)
+            learning_candidate = None
+            highest_freq = 1 # Only consider inputs that occurred more than once
+
+            # Check Refusals first, then Knowledge Gaps (can adjust priority)
+            candidate_types_priority = ["Refusal", "Knowledge Gap"]
+            for e_type in candidate_types_priority:
+                 if e_type in top_input_per_type:
+                      top_input_count, top_input_str = top_input_per_type[e_type]
+                      analysis_output.append(f"\nMost frequent input for '{e_type}': '{top_input_str}' ({top_input_count} times)")
+                      if top_input_count > highest_freq:
+                           highest_freq = top_input_count
+                           learning_candidate = (e_type, top_input_str) # Store (type, input) tuple
+
+            if inputs_with_feedback:
+                 analysis_output.append("\nInputs with User Feedback Provided (Top 5):")
+                 for inp, count in inputs_with_feedback.most_common(5):
+                      analysis_output.append(f"- '{inp}' ({count} feedback instance(s))")
+                 # Could prioritize learning based on feedback count as well
+                 # Example: if inputs_with_feedback.most_common(1)[0][1] > highest_freq: ...
+
+            analysis_output.append("--- Analysis Complete ---")
+            return "\n".join(analysis_output), learning_candidate
 
     def add_learned_knowledge(self, keyword, response):
         """Adds or updates a learned keyword/response pair."""
         if not keyword or not response:
-             print("WARNING: Attempted to learn empty keyword or response.")
+             logger.warning("Attempted to learn empty keyword or response.")
              return False
         # Ensure knowledge base is a dictionary
         if not isinstance(self.learned_knowledge, dict):
-             print(f"WARNING: Learned knowledge was not a dict ({type(self.learned_knowledge)}). Resetting.")
+             logger.warning("Learned knowledge was not a dict (%s). Resetting.", type(self.learned_knowledge))
              self.learned_knowledge = self.DEFAULT_KNOWLEDGE.copy()
 
-        self.learned_knowledge[keyword.lower().strip()] = response.strip()
-        print(f"INFO: Learned knowledge added/updated for keyword '{keyword}'")
-        return save_json_robust(self.knowledge_file, self.learned_knowledge)
+        with self._lock:
+            self.learned_knowledge[clean_input(keyword)] = response.strip()
+            logger.info("Learned knowledge added/updated for keyword %r", keyword)
+            return save_json_robust(self.knowledge_file, self.learned_knowledge)
 
     def clear_log_file_data(self):
         """Clears the error log data and saves."""
-        self.error_logs = []
-        if save_json_robust(self.log_file, self.error_logs):
-            print("INFO: Error log cleared.")
-            return True
-        return False
+        with self._lock:
+            # Indices handed out before the clear must not match new entries
+            self._first_index += len(self.error_logs)
+            self.error_logs.clear()
+            self.log_version += 1
+            self._reset_counts()
+            if self.compact_log():
+                logger.info("Error log cleared.")
+                return True
+            return False
 
     def reset_knowledge_data(self):
         """Resets learned knowledge to default and saves."""
-        self.learned_knowledge = self.DEFAULT_KNOWLEDGE.copy()
-        if save_json_robust(self.knowledge_file, self.learned_knowledge):
-            print("INFO: Learned knowledge reset to default.")
-            return True
-        return False
+        with self._lock:
+            self.learned_knowledge = self.DEFAULT_KNOWLEDGE.copy()
+            if save_json_robust(self.knowledge_file, self.learned_knowledge):
+                logger.info("Learned knowledge reset to default.")
+                return True
+            return False
+
+# The knowledge base and error log are read once per process, not once per session;
+# every session works on the same instance, so what one learns or logs all see
+@st.cache_resource
+def get_chatbot():
+    return SelfAwareChatbotStreamlit()
+
+# The log view is encoded once per change to the log rather than on every rerun while it's open;
+# the chatbot is left out of the cache key
+@st.cache_data(max_entries=1)
+def recent_logs_json(log_version, _chatbot):
+    return json_bytes(_chatbot.recent_logs(LOG_VIEW_ENTRIES), indent=True).decode('utf-8')
 
 # --- Google Generative AI Setup ---
-# Use a flag in session state to configure only once per session
-if 'genai_configured' not in st.session_state:
+# The client and config are cached per process, so looking them up on every rerun is cheap;
+# they're passed to generate_response on each call, so it always gets the current config
+genai_client = genai_config = None
+try:
+    GOOGLE_API_KEY = st.secrets["GOOGLE_API_KEY"]
+    genai_client = get_gemini_client(GOOGLE_API_KEY)
+    # The system prompt is held in a provider-side context cache when it is large enough
+    genai_config = get_gemini_config(GOOGLE_API_KEY, SYSTEM_PROMPT, model_name=GENAI_MODEL)
+    if not st.session_state.get("genai_configured"):
+        logger.info("Google Generative AI configured successfully.")
+    st.session_state.genai_configured = True
+except KeyError:
+    st.error("ERROR: GOOGLE_API_KEY not found in st.secrets. Please add it to your .streamlit/secrets.toml file.")
+    st.stop()
+except Exception as e:
     st.session_state.genai_configured = False
-    try:
-        GOOGLE_API_KEY = st.secrets["GOOGLE_API_KEY"]
-        genai.configure(api_key=GOOGLE_API_KEY)
-        genai_model = genai.GenerativeModel('gemini-1.5-flash') # Or another suitable model
-        st.session_state.genai_configured = True
-        print("INFO: Google Generative AI configured successfully.")
-    except KeyError:
-        st.error("ERROR: GOOGLE_API_KEY not found in st.secrets. Please add it to your .streamlit/secrets.toml file.")
-        st.stop()
-    except Exception as e:
-        st.error(f"ERROR: Could not configure Google Generative AI: {e}")
-        traceback.print_exc()
-        # Don't stop here, maybe user can still use learned responses or analyze logs
-        st.warning("GenAI features will be unavailable.")
+    st.error(f"ERROR: Could not configure Google Generative AI: {e}")
+    logger.exception("Could not configure Google Generative AI")
+    # Don't stop here, maybe user can still use learned responses or analyze logs
+    st.warning("GenAI features will be unavailable.")
+
+# Repeated or paraphrased questions are answered from a local cache
+response_cache = get_response_cache(SYSTEM_PROMPT)
+rate_limiter = get_rate_limiter("gemini")
 
 
 # --- Streamlit UI ---
@@ -354,13 +604,8 @@ st.caption("Using Google Generative AI with improved error handling and state ma
 # --- Initialize Session State (Robustly) ---
 # Ensures chatbot instance is created/reloaded correctly
 if "chatbot" not in st.session_state:
-    st.session_state.chatbot = SelfAwareChatbotStreamlit()
-    print("INFO: Created chatbot instance in session state.")
-else:
-     # Optional: If you want to ensure it reloads data from files on every run
-     # st.session_state.chatbot = SelfAwareChatbotStreamlit()
-     # print("INFO: Reloaded chatbot instance in session state.")
-     pass # Usually, keeping the instance is fine
+    st.session_state.chatbot = get_chatbot()
+    logger.info("Attached shared chatbot instance to session state.")
 
 if "messages" not in st.session_state:
     st.session_state.messages = [{"role": "assistant", "content": "Hello! How can I assist you today?"}]
@@ -408,7 +653,7 @@ with st.sidebar:
             st.subheader("Simulated Learning Opportunity")
             error_type, input_to_learn = st.session_state.learning_candidate
             # Sanitize key slightly (replace spaces, limit length) - basic protection
-            sanitized_input_key = "".join(filter(str.isalnum, input_to_learn)).lower()[:20]
+            sanitized_input_key = widget_key(input_to_learn)
 
             st.write(f"Frequent input causing '{error_type}':")
             st.info(f"`{input_to_learn}`")
@@ -453,13 +698,11 @@ with st.sidebar:
     # Display Log (Conditional)
     if st.session_state.show_log:
          st.write("Error Logs:")
+         chatbot = st.session_state.chatbot
+         st.caption(f"Newest {min(LOG_VIEW_ENTRIES, len(chatbot.error_logs))} of {len(chatbot.error_logs)} entries")
          # Add error handling for displaying JSON
          try:
-             if isinstance(st.session_state.chatbot.error_logs, list):
-                st.json(st.session_state.chatbot.error_logs, expanded=False)
-             else:
-                 st.error("Log data is not in the expected format (list).")
-                 st.write(st.session_state.chatbot.error_logs) # Show raw data if possible
+             st.code(recent_logs_json(chatbot.log_version, chatbot), language="json")
          except Exception as display_e:
               st.error(f"Error displaying log data: {display_e}")
 
@@ -518,6 +761,10 @@ with st.sidebar:
 
 # --- Main Chat Area ---
 
+# Background saves can't show errors themselves, so a failure is reported on the next rerun
+if save_failure := st.session_state.chatbot.pop_save_failure():
+    st.error(save_failure)
+
 # Display chat messages
 for i, message in enumerate(st.session_state.messages):
     with st.chat_message(message["role"]):
@@ -538,7 +785,7 @@ if st.session_state.feedback_requested and isinstance(st.session_state.last_erro
             if feedback_text:
                 if st.session_state.chatbot.add_feedback_to_log(st.session_state.last_error_log_index, feedback_text):
                     st.toast("Thank you for your feedback!", icon="✅")
-                # Else: error handled/printed in add_feedback_to_log
+                # Else: error handled/logged in add_feedback_to_log
                 st.session_state.feedback_requested = False # Turn off feedback mode
                 st.rerun()
             else:
@@ -548,7 +795,7 @@ if st.session_state.feedback_requested and isinstance(st.session_state.last_erro
         if st.button("Skip Feedback", key=skip_fb_key):
             if st.session_state.chatbot.add_feedback_to_log(st.session_state.last_error_log_index, "skipped"):
                 st.toast("Feedback skipped.", icon=" N ")
-            # Else: error handled/printed
+            # Else: error handled/logged
             st.session_state.feedback_requested = False # Turn off feedback mode
             st.rerun()
 
@@ -578,13 +825,15 @@ if prompt := st.chat_input("Ask me anything...", disabled=chat_input_disabled, k
     if not st.session_state.genai_configured:
          # Handle case where GenAI failed to initialize
          with st.chat_message("assistant"):
-             fallback_resp = st.session_state.chatbot.learned_knowledge.get(prompt.lower().strip(), "Sorry, AI features are unavailable.")
+             fallback_resp = st.session_state.chatbot.learned_knowledge.get(clean_input(prompt), "Sorry, AI features are unavailable.")
              st.markdown(fallback_resp)
              st.session_state.messages.append({"role": "assistant", "content": fallback_resp})
     else:
          # Generate response using the chatbot instance
         with st.spinner("Thinking..."):
-            bot_response, error_index = st.session_state.chatbot.generate_response(prompt, st.session_state.messages)
+            bot_response, error_index = st.session_state.chatbot.generate_response(
+                prompt, st.session_state.messages, genai_client, genai_config, rate_limiter, response_cache
+            )
 
         # Display assistant response
         with st.chat_message("assistant"):
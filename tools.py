@@ -0,0 +1,139 @@
+"""
+Tool functions shared by the chatbots.
+"""
+
+import json
+import math
+import re
+from datetime import datetime
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; the stdlib parser accepts the same payloads, only slower
+    json_loads = json.loads
+
+
+def get_time():
+    """Returns the current date and time."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def calculate(operation, numbers):
+    """Performs basic calculations on a list of numbers."""
+    if not isinstance(numbers, list) or len(numbers) < 2:
+        return "Error: Provide at least two numbers."
+
+    try:
+        if operation == "add":
+            return _sum(numbers)
+        elif operation == "subtract":
+            return numbers[0] - _sum(numbers[1:])
+        elif operation == "multiply":
+            return math.prod(numbers)
+        elif operation == "divide":
+            if 0 in numbers[1:]:
+                return "Error: Division by zero is not allowed."
+            return numbers[0] / math.prod(numbers[1:])
+        else:
+            return "Error: Unsupported operation. Use 'add', 'subtract', 'multiply', or 'divide'."
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def parse_arguments(payload):
+    """Decodes a JSON tool-argument payload; an empty payload means no arguments."""
+    if not payload or not payload.strip():
+        return {}
+    return json_loads(payload)
+
+
+def _sum(numbers):
+    """Sums in C; integer sums are exact, float sums use fsum to avoid rounding drift."""
+    if all(isinstance(num, int) for num in numbers):
+        return sum(numbers)
+    return math.fsum(numbers)
+
+
+# Handlers keyed by tool name; each takes the decoded argument dict
+TOOLS = {
+    "get_time": lambda params: get_time(),
+    "calculate": lambda params: calculate(params.get("operation"), params.get("numbers")),
+}
+
+# Function schemas for providers with native tool calling, keyed by tool name
+TOOL_SCHEMAS = {
+    "get_time": {
+        "type": "function",
+        "function": {
+            "name": "get_time",
+            "description": "Fetch the current date and time",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    },
+    "calculate": {
+        "type": "function",
+        "function": {
+            "name": "calculate",
+            "description": "Perform mathematical calculations",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "operation": {"type": "string", "enum": ["add", "subtract", "multiply", "divide"], "description": "The operation to perform (add, subtract, multiply, divide)"},
+                    "numbers": {"type": "array", "items": {"type": "number"}, "description": "A list of numbers to process"},
+                },
+                "required": ["operation", "numbers"],
+            },
+        },
+    },
+}
+
+
+
+def _gemini_schema(schema):
+    """Rewrites a JSON schema in Gemini's dialect: upper-case types and no enum constraint."""
+    converted = {key: value for key, value in schema.items() if key not in ("type", "enum", "properties", "items")}
+    converted["type"] = schema["type"].upper()
+    if "properties" in schema:
+        converted["properties"] = {name: _gemini_schema(prop) for name, prop in schema["properties"].items()}
+    if "items" in schema:
+        converted["items"] = _gemini_schema(schema["items"])
+    return converted
+
+
+def gemini_tools(names):
+    """Returns the named tools as a Gemini tool of function declarations."""
+    declarations = []
+    for name in names:
+        function = TOOL_SCHEMAS[name]["function"]
+        declaration = {"name": function["name"], "description": function["description"]}
+        # Gemini rejects object schemas without properties, so argument-less tools omit them
+        if function["parameters"]["properties"]:
+            declaration["parameters"] = _gemini_schema(function["parameters"])
+        declarations.append(declaration)
+    return {"function_declarations": declarations}
+
+
+# Text protocol for prompts that ask the model to reply "[CALL:<tool>] <json arguments>";
+# the name is looked up in TOOLS, so new tools need no change here
+TOOL_CALL_RE = re.compile(r"^\[CALL:(?P<name>\w+)\]\s*(?P<body>.*)", re.S)
+
+
+def invoke_tool(name, params):
+    """Runs a tool by name with its decoded argument dict and returns the result as text."""
+    handler = TOOLS.get(name)
+    if handler is None:
+        return "Unknown tool called."
+    return str(handler(params))
+
+
+def call_tool(name, arguments):
+    """Runs a tool by name with its JSON-encoded arguments and returns the result as text."""
+    if name not in TOOLS:
+        return "Unknown tool called."
+    try:
+        params = parse_arguments(arguments)
+    except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
+        params = None
+    if not isinstance(params, dict):
+        return f"Error: Could not parse the arguments for {name}."
+    return invoke_tool(name, params)